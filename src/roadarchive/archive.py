@@ -3,20 +3,197 @@ RoadArchive - Archive Operations for BlackRoad
 Create and extract archives in various formats.
 """
 
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Callable, Dict, Generator, List, Optional, Union
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Union
 import gzip
+import io
+import mmap
 import os
+import posixpath
+import queue
 import shutil
+import struct
+import subprocess
 import tarfile
+import threading
 import zipfile
+import zlib
 import logging
 
+try:
+    import libdeflate as _libdeflate
+except ImportError:
+    _libdeflate = None
+
+try:
+    import rapidgzip as _rapidgzip
+except ImportError:
+    _rapidgzip = None
+
+try:
+    from isal import igzip_threaded as _igzip_threaded
+except ImportError:
+    _igzip_threaded = None
+
 logger = logging.getLogger(__name__)
 
+# Extra-field header id for the deflate block-offset index ("BR").
+_BLOCK_EXTRA_ID = 0x5242
+
+_BUF_SIZE = 1 << 20
+_BUF_POOL: queue.LifoQueue = queue.LifoQueue()
+
+
+def _get_buf() -> bytearray:
+    try:
+        return _BUF_POOL.get_nowait()
+    except queue.Empty:
+        return bytearray(_BUF_SIZE)
+
+
+def _put_buf(buf: bytearray) -> None:
+    _BUF_POOL.put_nowait(buf)
+
+
+def _read_range(fd: int, offset: int, size: int) -> bytes:
+    """Positioned read; one syscall, no shared file-offset churn."""
+    chunks = []
+    while size > 0:
+        chunk = os.pread(fd, size, offset)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        offset += len(chunk)
+        size -= len(chunk)
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+def _read_exact(src, size: int) -> bytes:
+    """Read a stream of known size into one preallocated buffer."""
+    buf = bytearray(size)
+    mv = memoryview(buf)
+    off = 0
+    while off < size:
+        n = src.readinto(mv[off:])
+        if not n:
+            return bytes(mv[:off])
+        off += n
+    return bytes(buf)
+
+
+def _make_parent_dirs(dest: Path, names: List[str]) -> None:
+    """Create every unique parent directory once, ancestors memoized."""
+    made = set()
+    base = str(dest)
+    for name in names:
+        if name.startswith("/") or ".." in name.split("/"):
+            continue
+        parent = posixpath.dirname(name)
+        if parent and parent not in made:
+            os.makedirs(os.path.join(base, parent), exist_ok=True)
+            while parent and parent not in made:
+                made.add(parent)
+                parent = posixpath.dirname(parent)
+
+
+def _copy_fd_range(src_fd: int, dst_fd: int, offset: int, count: int) -> None:
+    """Copy a byte range between descriptors, kernel-side when possible."""
+    if hasattr(os, "sendfile"):
+        try:
+            while count > 0:
+                sent = os.sendfile(dst_fd, src_fd, offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                count -= sent
+            return
+        except OSError:
+            pass  # e.g. sendfile unsupported for this fd pair; copy manually
+    while count > 0:
+        chunk = os.pread(src_fd, min(count, _BUF_SIZE), offset)
+        if not chunk:
+            break
+        os.write(dst_fd, chunk)
+        offset += len(chunk)
+        count -= len(chunk)
+
+
+def _pack_block_extra(block_size: int, offsets: List[int]) -> bytes:
+    payload = struct.pack("<IH", block_size, len(offsets))
+    payload += b"".join(struct.pack("<Q", off) for off in offsets)
+    if 4 + len(payload) > 0xFFFF:
+        return b""
+    return struct.pack("<HH", _BLOCK_EXTRA_ID, len(payload)) + payload
+
+
+def _unpack_block_extra(extra: bytes) -> Optional[List[int]]:
+    pos = 0
+    while pos + 4 <= len(extra):
+        field_id, length = struct.unpack_from("<HH", extra, pos)
+        pos += 4
+        if field_id == _BLOCK_EXTRA_ID and length >= 6:
+            _, count = struct.unpack_from("<IH", extra, pos)
+            return [struct.unpack_from("<Q", extra, pos + 6 + 8 * i)[0]
+                    for i in range(count)]
+        pos += length
+    return None
+
+
+def _zip_write_precompressed(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo,
+                             raw: bytes) -> None:
+    """Append an entry whose deflate stream was produced outside ZipFile."""
+    zinfo.compress_size = len(raw)
+    with zf._lock:
+        if zf._seekable:
+            zf.fp.seek(zf.start_dir)
+        zinfo.header_offset = zf.fp.tell()
+        zf._writecheck(zinfo)
+        zf._didModify = True
+        zip64 = (zinfo.file_size > zipfile.ZIP64_LIMIT or
+                 zinfo.compress_size > zipfile.ZIP64_LIMIT)
+        zf.fp.write(zinfo.FileHeader(zip64))
+        zf.fp.write(raw)
+        zf.start_dir = zf.fp.tell()
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+
+
+def _open_parallel_compressor(path: Path, threads: int):
+    """Writable gzip sink backed by a multi-threaded encoder, or (None, None)."""
+    if _igzip_threaded is not None:
+        return _igzip_threaded.open(str(path), "wb", threads=threads), None
+    pigz = shutil.which("pigz")
+    if pigz:
+        out = open(path, "wb")
+        proc = subprocess.Popen([pigz, "-p", str(threads)],
+                                stdin=subprocess.PIPE, stdout=out)
+        out.close()
+        return proc.stdin, proc
+    return None, None
+
+
+def _open_gzip_parallel(path: Path):
+    if _rapidgzip is None:
+        return None
+    return _rapidgzip.open(str(path), parallelization=os.cpu_count())
+
+
+def _inflate_bytes(data: bytes, is_gzip: bool, size: int = None) -> bytes:
+    if _libdeflate is not None:
+        decompressor = _libdeflate.Decompressor()
+        if is_gzip:
+            return decompressor.decompress_gzip(data)
+        return decompressor.decompress_deflate(data, size)
+    if is_gzip:
+        return gzip.decompress(data)
+    return zlib.decompress(data, wbits=-zlib.MAX_WBITS)
+
 
 class ArchiveError(Exception):
     pass
@@ -31,120 +208,571 @@ class ArchiveFormat(str, Enum):
     GZIP = "gz"
 
 
+_SUFFIX_MAP = {
+    ("zip",): ArchiveFormat.ZIP,
+    ("tar", "gz"): ArchiveFormat.TAR_GZ,
+    ("tgz",): ArchiveFormat.TAR_GZ,
+    ("tar", "bz2"): ArchiveFormat.TAR_BZ2,
+    ("tbz2",): ArchiveFormat.TAR_BZ2,
+    ("tar", "xz"): ArchiveFormat.TAR_XZ,
+    ("txz",): ArchiveFormat.TAR_XZ,
+    ("tar",): ArchiveFormat.TAR,
+    ("gz",): ArchiveFormat.GZIP,
+}
+
+
+def _detect_format(path: Path, default: ArchiveFormat = None) -> ArchiveFormat:
+    parts = path.name.lower().rsplit(".", 2)
+    if len(parts) > 1:
+        for key in (tuple(parts[-2:]), (parts[-1],)):
+            fmt = _SUFFIX_MAP.get(key)
+            if fmt is not None:
+                return fmt
+    if default is not None:
+        return default
+    raise ArchiveError(f"Unknown archive format: {path.name}")
+
+
 @dataclass
 class ArchiveEntry:
     name: str
     size: int
     compressed_size: int = 0
-    modified: datetime = None
+    # Epoch seconds (tar) or the raw DOS date_time tuple (zip); see `modified`.
+    mtime: Any = None
     is_dir: bool = False
-    is_file: bool = True
     mode: int = 0
 
+    @property
+    def modified(self) -> Optional[datetime]:
+        if self.mtime is None:
+            return None
+        if isinstance(self.mtime, tuple):
+            return datetime(*self.mtime)
+        return datetime.fromtimestamp(self.mtime)
+
+    @property
+    def is_file(self) -> bool:
+        return not self.is_dir
+
+
+class ArchiveEntries:
+    """Column-oriented entry listing; rows materialize as ArchiveEntry on access."""
+
+    _IS_DIR = 1
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.sizes = array("q")
+        self.csizes = array("q")
+        # Epoch seconds (tar) or the raw DOS date_time tuple (zip); decoded lazily.
+        self.mtimes: List[Any] = []
+        self.modes = array("l")
+        self.flags = array("B")
+
+    def append(self, name: str, size: int, csize: int, mtime: Any,
+               mode: int, is_dir: bool) -> None:
+        self.names.append(name)
+        self.sizes.append(size)
+        self.csizes.append(csize)
+        self.mtimes.append(mtime)
+        self.modes.append(mode)
+        self.flags.append(self._IS_DIR if is_dir else 0)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index) -> ArchiveEntry:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return ArchiveEntry(
+            name=self.names[index],
+            size=self.sizes[index],
+            compressed_size=self.csizes[index],
+            mtime=self.mtimes[index],
+            is_dir=bool(self.flags[index] & self._IS_DIR),
+            mode=self.modes[index],
+        )
+
+    def __iter__(self) -> Generator[ArchiveEntry, None, None]:
+        for i in range(len(self.names)):
+            yield self[i]
+
 
 @dataclass
 class ArchiveInfo:
     path: Path
     format: ArchiveFormat
     size: int
-    entries: List[ArchiveEntry] = field(default_factory=list)
+    _archive: Optional["Archive"] = field(default=None, repr=False, compare=False)
+
+    @cached_property
+    def entries(self) -> ArchiveEntries:
+        archive = self._archive if self._archive is not None else Archive(self.path)
+        return archive.list()
 
 
 class Archive:
     def __init__(self, path: Union[str, Path]):
         self.path = Path(path)
-        self.format = self._detect_format()
-
-    def _detect_format(self) -> ArchiveFormat:
-        name = self.path.name.lower()
-        if name.endswith(".zip"):
-            return ArchiveFormat.ZIP
-        elif name.endswith(".tar.gz") or name.endswith(".tgz"):
-            return ArchiveFormat.TAR_GZ
-        elif name.endswith(".tar.bz2") or name.endswith(".tbz2"):
-            return ArchiveFormat.TAR_BZ2
-        elif name.endswith(".tar.xz") or name.endswith(".txz"):
-            return ArchiveFormat.TAR_XZ
-        elif name.endswith(".tar"):
-            return ArchiveFormat.TAR
-        elif name.endswith(".gz"):
-            return ArchiveFormat.GZIP
-        raise ArchiveError(f"Unknown archive format: {name}")
-
-    def list(self) -> List[ArchiveEntry]:
-        entries = []
+        self.format = _detect_format(self.path)
+        self._zf: Optional[zipfile.ZipFile] = None
+        self._tf: Optional[tarfile.TarFile] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._fd: Optional[int] = None
+        self._entries: Optional[ArchiveEntries] = None
+
+    def _open_zip(self) -> zipfile.ZipFile:
+        if self._zf is None:
+            fh = open(self.path, "rb")
+            if hasattr(os, "posix_fadvise"):
+                # The EOCD scan reads the tail; keep the kernel from
+                # sequentially reading ahead through the whole archive.
+                fd = fh.fileno()
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_RANDOM)
+                size = os.fstat(fd).st_size
+                os.posix_fadvise(fd, max(0, size - 65536), min(size, 65536),
+                                 os.POSIX_FADV_WILLNEED)
+            self._zf = zipfile.ZipFile(fh)
+        return self._zf
+
+    def _open_tar(self) -> tarfile.TarFile:
+        if self._tf is None:
+            self._tf = tarfile.open(self.path, self._tar_mode("r"))
+        return self._tf
+
+    def _open_fd(self) -> int:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY)
+        return self._fd
+
+    def _open_mmap(self) -> mmap.mmap:
+        if self._mm is None:
+            with open(self.path, "rb") as fh:
+                self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def close(self) -> None:
+        if self._zf is not None:
+            # ZipFile won't close a file object it was handed; do it ourselves.
+            fp = self._zf.fp
+            self._zf.close()
+            if fp is not None:
+                fp.close()
+            self._zf = None
+        if self._tf is not None:
+            self._tf.close()
+            self._tf = None
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # A read_view() memoryview is still alive; leave the map open.
+                pass
+            else:
+                self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def list(self) -> ArchiveEntries:
+        if self._entries is not None:
+            return self._entries
+        entries = ArchiveEntries()
+        append = entries.append
         if self.format == ArchiveFormat.ZIP:
-            with zipfile.ZipFile(self.path, "r") as zf:
-                for info in zf.infolist():
-                    entries.append(ArchiveEntry(
-                        name=info.filename,
-                        size=info.file_size,
-                        compressed_size=info.compress_size,
-                        modified=datetime(*info.date_time),
-                        is_dir=info.is_dir(),
-                        is_file=not info.is_dir()
-                    ))
+            for info in self._open_zip().infolist():
+                name = info.filename
+                append(name, info.file_size, info.compress_size,
+                       info.date_time, 0, name.endswith("/"))
         elif self.format in (ArchiveFormat.TAR, ArchiveFormat.TAR_GZ, ArchiveFormat.TAR_BZ2, ArchiveFormat.TAR_XZ):
-            mode = self._tar_mode("r")
-            with tarfile.open(self.path, mode) as tf:
-                for info in tf.getmembers():
-                    entries.append(ArchiveEntry(
-                        name=info.name,
-                        size=info.size,
-                        modified=datetime.fromtimestamp(info.mtime),
-                        is_dir=info.isdir(),
-                        is_file=info.isfile(),
-                        mode=info.mode
-                    ))
+            for info in self._open_tar().getmembers():
+                append(info.name, info.size, 0, info.mtime,
+                       info.mode, info.isdir())
+        self._entries = entries
         return entries
 
-    def extract(self, dest: Union[str, Path] = ".", members: List[str] = None) -> List[Path]:
+    def iter_entries(self) -> Generator[ArchiveEntry, None, None]:
+        if self._entries is not None:
+            yield from self._entries
+            return
+        if self.format == ArchiveFormat.ZIP:
+            for info in self._open_zip().infolist():
+                name = info.filename
+                yield ArchiveEntry(name, info.file_size, info.compress_size,
+                                   info.date_time, name.endswith("/"))
+        elif self.format in (ArchiveFormat.TAR, ArchiveFormat.TAR_GZ, ArchiveFormat.TAR_BZ2, ArchiveFormat.TAR_XZ):
+            for info in self._open_tar():
+                yield ArchiveEntry(info.name, info.size, 0, info.mtime,
+                                   info.isdir(), info.mode)
+
+    def extract(self, dest: Union[str, Path] = ".", members: List[str] = None,
+                concurrency: int = None, preserve_mtime: bool = True,
+                preserve_mode: bool = True) -> List[Path]:
         dest = Path(dest)
         dest.mkdir(parents=True, exist_ok=True)
         extracted = []
+        workers = concurrency or 1
 
         if self.format == ArchiveFormat.ZIP:
-            with zipfile.ZipFile(self.path, "r") as zf:
-                if members:
-                    for m in members:
-                        zf.extract(m, dest)
-                        extracted.append(dest / m)
-                else:
-                    zf.extractall(dest)
-                    extracted = [dest / n for n in zf.namelist()]
+            if workers > 1:
+                return self._extract_zip_parallel(dest, members, workers,
+                                                  preserve_mode)
+            return self._extract_zip_serial(dest, members, preserve_mode)
         elif self.format in (ArchiveFormat.TAR, ArchiveFormat.TAR_GZ, ArchiveFormat.TAR_BZ2, ArchiveFormat.TAR_XZ):
-            mode = self._tar_mode("r")
-            with tarfile.open(self.path, mode) as tf:
-                if members:
-                    for m in members:
-                        tf.extract(m, dest)
-                        extracted.append(dest / m)
-                else:
-                    tf.extractall(dest)
-                    extracted = [dest / m.name for m in tf.getmembers()]
+            if workers > 1:
+                return self._extract_tar_parallel(dest, members, workers,
+                                                  preserve_mtime, preserve_mode)
+            if self.format == ArchiveFormat.TAR_GZ:
+                stream = _open_gzip_parallel(self.path)
+                if stream is not None:
+                    wanted = set(members) if members else None
+                    made_dirs = set()
+                    with stream, tarfile.open(fileobj=stream, mode="r|") as tf:
+                        for member in tf:
+                            if wanted is not None:
+                                if member.name not in wanted:
+                                    continue
+                                wanted.discard(member.name)
+                            target = self._write_tar_member(
+                                tf, member, dest, preserve_mtime,
+                                preserve_mode, made_dirs)
+                            if target is not None:
+                                extracted.append(target)
+                    if wanted:
+                        raise KeyError(
+                            f"No such member(s) in {self.path.name}: "
+                            f"{', '.join(sorted(wanted))}")
+                    return extracted
+            return self._extract_tar_serial(dest, members, preserve_mtime,
+                                            preserve_mode)
         elif self.format == ArchiveFormat.GZIP:
             out_path = dest / self.path.stem
-            with gzip.open(self.path, "rb") as f_in:
-                with open(out_path, "wb") as f_out:
-                    shutil.copyfileobj(f_in, f_out)
+            stream = _open_gzip_parallel(self.path)
+            if stream is not None:
+                with stream as f_in, open(out_path, "wb") as f_out:
+                    shutil.copyfileobj(f_in, f_out, length=1 << 20)
+            elif _libdeflate is not None:
+                out_path.write_bytes(_inflate_bytes(self.path.read_bytes(), is_gzip=True))
+            else:
+                buf = _get_buf()
+                try:
+                    mv = memoryview(buf)
+                    with gzip.open(self.path, "rb") as f_in:
+                        with open(out_path, "wb") as f_out:
+                            while True:
+                                n = f_in.readinto(mv)
+                                if not n:
+                                    break
+                                f_out.write(mv[:n])
+                finally:
+                    _put_buf(buf)
             extracted = [out_path]
 
         return extracted
 
+    def _extract_zip_serial(self, dest: Path, members: Optional[List[str]],
+                            preserve_mode: bool = True) -> List[Path]:
+        zf = self._open_zip()
+        infos = zf.infolist()
+        if members:
+            self.prefetch(members)
+            wanted = set(members)
+            infos = [i for i in infos if i.filename in wanted]
+            missing = wanted - {i.filename for i in infos}
+            if missing:
+                raise KeyError(
+                    f"No such member(s) in {self.path.name}: "
+                    f"{', '.join(sorted(missing))}")
+        _make_parent_dirs(dest, [i.filename for i in infos])
+        fd = self._open_fd()
+        extracted = []
+        for info in infos:
+            name = info.filename
+            if name.startswith("/") or ".." in name.split("/"):
+                logger.warning("Skipping unsafe zip member: %s", name)
+                continue
+            target = dest / name
+            if info.is_dir():
+                target.mkdir(exist_ok=True)
+            else:
+                if (info.compress_type == zipfile.ZIP_STORED
+                        and not info.flag_bits & 0x1):
+                    data_off = self._zip_data_offset(info)
+                    with open(target, "wb") as dst:
+                        _copy_fd_range(fd, dst.fileno(), data_off, info.file_size)
+                else:
+                    with zf.open(info) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst, length=128 * 1024)
+                mode = info.external_attr >> 16
+                if preserve_mode and mode:
+                    os.chmod(target, mode)
+            extracted.append(target)
+        return extracted
+
+    def _extract_tar_serial(self, dest: Path, members: Optional[List[str]],
+                            preserve_mtime: bool = True,
+                            preserve_mode: bool = True) -> List[Path]:
+        tf = self._open_tar()
+        infos = tf.getmembers()
+        if members:
+            wanted = set(members)
+            infos = [m for m in infos if m.name in wanted]
+            missing = wanted - {m.name for m in infos}
+            if missing:
+                raise KeyError(
+                    f"No such member(s) in {self.path.name}: "
+                    f"{', '.join(sorted(missing))}")
+        _make_parent_dirs(dest, [m.name for m in infos])
+        extracted = []
+        for member in infos:
+            target = self._write_tar_member(tf, member, dest, preserve_mtime,
+                                            preserve_mode)
+            if target is not None:
+                extracted.append(target)
+        return extracted
+
+    def _write_tar_member(self, tf: tarfile.TarFile, member: tarfile.TarInfo,
+                          dest: Path, preserve_mtime: bool, preserve_mode: bool,
+                          made_dirs: set = None) -> Optional[Path]:
+        if os.path.isabs(member.name) or ".." in Path(member.name).parts:
+            logger.warning("Skipping unsafe tar member: %s", member.name)
+            return None
+        target = dest / member.name
+        if made_dirs is not None:
+            # Streaming callers have no pre-created parent pass.
+            parent = target.parent
+            if parent not in made_dirs:
+                parent.mkdir(parents=True, exist_ok=True)
+                made_dirs.add(parent)
+        if member.isdir():
+            target.mkdir(exist_ok=True)
+            if preserve_mode and member.mode:
+                os.chmod(target, member.mode)
+        elif member.isfile():
+            with tf.extractfile(member) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, length=_BUF_SIZE)
+            if preserve_mode and member.mode:
+                os.chmod(target, member.mode)
+            if preserve_mtime:
+                os.utime(target, (member.mtime, member.mtime))
+        else:
+            # Symlinks, devices and the like keep the stdlib handling.
+            tf.extract(member, dest)
+        return target
+
+    def _extract_zip_parallel(self, dest: Path, members: Optional[List[str]],
+                              workers: int, preserve_mode: bool = True) -> List[Path]:
+        infos = self._open_zip().infolist()
+        if members:
+            self.prefetch(members)
+            wanted = set(members)
+            infos = [i for i in infos if i.filename in wanted]
+            missing = wanted - {i.filename for i in infos}
+            if missing:
+                raise KeyError(
+                    f"No such member(s) in {self.path.name}: "
+                    f"{', '.join(sorted(missing))}")
+        safe = []
+        for info in infos:
+            name = info.filename
+            if name.startswith("/") or ".." in name.split("/"):
+                logger.warning("Skipping unsafe zip member: %s", name)
+                continue
+            safe.append(info)
+        infos = safe
+        _make_parent_dirs(dest, [i.filename for i in infos])
+        fd = self._open_fd()
+
+        # ZipFile is not thread-safe on a shared handle; keep one per worker
+        # thread rather than reparsing the central directory per entry.
+        local = threading.local()
+        handles: List[zipfile.ZipFile] = []
+        handles_lock = threading.Lock()
+
+        def _worker_zip() -> zipfile.ZipFile:
+            zf = getattr(local, "zf", None)
+            if zf is None:
+                zf = zipfile.ZipFile(self.path, "r")
+                local.zf = zf
+                with handles_lock:
+                    handles.append(zf)
+            return zf
+
+        def _extract_one(info: zipfile.ZipInfo) -> Path:
+            target = dest / info.filename
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+                return target
+            if (info.compress_type == zipfile.ZIP_STORED
+                    and not info.flag_bits & 0x1):
+                # Payload is contiguous on disk; copy the range kernel-side.
+                data_off = self._zip_data_offset(info)
+                with open(target, "wb") as dst:
+                    _copy_fd_range(fd, dst.fileno(), data_off, info.file_size)
+            else:
+                zf = _worker_zip()
+                with zf.open(info) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, length=128 * 1024)
+            mode = info.external_attr >> 16
+            if preserve_mode and mode:
+                os.chmod(target, mode)
+            return target
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                return list(ex.map(_extract_one, infos))
+        finally:
+            for zf in handles:
+                zf.close()
+
+    def _extract_tar_parallel(self, dest: Path, members: Optional[List[str]],
+                              workers: int, preserve_mtime: bool = True,
+                              preserve_mode: bool = True) -> List[Path]:
+        mode = self._tar_mode("r")
+        wanted = set(members) if members else None
+        extracted: List[Path] = []
+        futures = []
+        made_dirs = set()
+        dir_lock = threading.Lock()
+        # Bound buffered-but-unwritten members so the reader can't run away.
+        gate = threading.BoundedSemaphore(min(32, (os.cpu_count() or 1) * 4))
+
+        def _write_entry(member: tarfile.TarInfo, buf: bytes) -> Path:
+            try:
+                target = dest / member.name
+                parent = target.parent
+                with dir_lock:
+                    if parent not in made_dirs:
+                        parent.mkdir(parents=True, exist_ok=True)
+                        made_dirs.add(parent)
+                with open(target, "wb") as dst:
+                    dst.write(buf)
+                if preserve_mode and member.mode:
+                    os.chmod(target, member.mode)
+                if preserve_mtime:
+                    os.utime(target, (member.mtime, member.mtime))
+                return target
+            finally:
+                gate.release()
+
+        with tarfile.open(self.path, mode) as tf:
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                for member in tf:
+                    if wanted is not None:
+                        if member.name not in wanted:
+                            continue
+                        wanted.discard(member.name)
+                    if os.path.isabs(member.name) or ".." in Path(member.name).parts:
+                        logger.warning("Skipping unsafe tar member: %s", member.name)
+                        continue
+                    if member.isdir():
+                        target = dest / member.name
+                        target.mkdir(parents=True, exist_ok=True)
+                        extracted.append(target)
+                        continue
+                    if not member.isfile():
+                        continue
+                    buf = tf.extractfile(member).read()
+                    gate.acquire()
+                    futures.append(ex.submit(_write_entry, member, buf))
+                extracted.extend(f.result() for f in futures)
+        if wanted:
+            raise KeyError(
+                f"No such member(s) in {self.path.name}: "
+                f"{', '.join(sorted(wanted))}")
+        return extracted
+
     def extract_file(self, name: str, dest: Union[str, Path] = ".") -> Path:
         return self.extract(dest, [name])[0]
 
+    def _zip_data_offset(self, info: zipfile.ZipInfo) -> int:
+        header = _read_range(self._open_fd(), info.header_offset, 30)
+        if len(header) != 30 or header[:4] != b"PK\x03\x04":
+            raise ArchiveError(f"Bad local file header for {info.filename}")
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+        return info.header_offset + 30 + name_len + extra_len
+
+    def prefetch(self, names: List[str]) -> None:
+        if self.format != ArchiveFormat.ZIP or not hasattr(os, "posix_fadvise"):
+            return
+        zf = self._open_zip()
+        fd = self._open_fd()
+        for name in names:
+            try:
+                info = zf.getinfo(name)
+            except KeyError:
+                continue
+            offset = self._zip_data_offset(info)
+            os.posix_fadvise(fd, offset, info.compress_size,
+                             os.POSIX_FADV_WILLNEED)
+
+    def read_view(self, name: str) -> memoryview:
+        if self.format != ArchiveFormat.ZIP:
+            raise ArchiveError("read_view is only supported for ZIP archives")
+        info = self._open_zip().getinfo(name)
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ArchiveError(f"{name} is compressed; use read()")
+        if info.flag_bits & 0x1:
+            raise ArchiveError(f"{name} is encrypted; use read()")
+        mm = self._open_mmap()
+        offset = self._zip_data_offset(info)
+        return memoryview(mm)[offset:offset + info.file_size]
+
+    def read_parallel(self, name: str, threads: int = None) -> bytes:
+        if self.format != ArchiveFormat.ZIP:
+            return self.read(name)
+        info = self._open_zip().getinfo(name)
+        offsets = _unpack_block_extra(info.extra)
+        if not offsets or info.compress_type != zipfile.ZIP_DEFLATED:
+            return self.read(name)
+        mm = self._open_mmap()
+        base = self._zip_data_offset(info)
+        raw = memoryview(mm)[base:base + info.compress_size]
+        bounds = list(offsets) + [info.compress_size]
+
+        def _inflate_block(i: int) -> bytes:
+            return zlib.decompressobj(-zlib.MAX_WBITS).decompress(
+                raw[bounds[i]:bounds[i + 1]])
+
+        with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as ex:
+            parts = list(ex.map(_inflate_block, range(len(offsets))))
+        return b"".join(parts)
+
     def read(self, name: str) -> bytes:
         if self.format == ArchiveFormat.ZIP:
-            with zipfile.ZipFile(self.path, "r") as zf:
-                return zf.read(name)
+            zf = self._open_zip()
+            info = zf.getinfo(name)
+            if (info.compress_type == zipfile.ZIP_STORED and not info.is_dir()
+                    and not info.flag_bits & 0x1):
+                return bytes(self.read_view(name))
+            if (_libdeflate is not None
+                    and info.compress_type == zipfile.ZIP_DEFLATED
+                    and not info.flag_bits & 0x1):
+                offset = self._zip_data_offset(info)
+                raw = _read_range(self._open_fd(), offset, info.compress_size)
+                return _inflate_bytes(raw, is_gzip=False, size=info.file_size)
+            with zf.open(info) as src:
+                return _read_exact(src, info.file_size)
         elif self.format in (ArchiveFormat.TAR, ArchiveFormat.TAR_GZ, ArchiveFormat.TAR_BZ2, ArchiveFormat.TAR_XZ):
-            mode = self._tar_mode("r")
-            with tarfile.open(self.path, mode) as tf:
-                member = tf.getmember(name)
-                f = tf.extractfile(member)
-                if f:
-                    return f.read()
+            tf = self._open_tar()
+            member = tf.getmember(name)
+            f = tf.extractfile(member)
+            if f:
+                with f:
+                    return _read_exact(f, member.size)
         raise ArchiveError(f"Cannot read {name}")
 
     def info(self) -> ArchiveInfo:
@@ -152,7 +780,7 @@ class Archive:
             path=self.path,
             format=self.format,
             size=self.path.stat().st_size,
-            entries=self.list()
+            _archive=self
         )
 
     def _tar_mode(self, base: str) -> str:
@@ -166,71 +794,156 @@ class Archive:
 
 
 class ArchiveBuilder:
-    def __init__(self, path: Union[str, Path], format: ArchiveFormat = None):
+    def __init__(self, path: Union[str, Path], format: ArchiveFormat = None,
+                 threads: int = None, parallel_blocks: bool = False,
+                 block_size: int = 1 << 20):
         self.path = Path(path)
-        self.format = format or self._detect_format()
-        self._files: List[tuple] = []
-
-    def _detect_format(self) -> ArchiveFormat:
-        name = self.path.name.lower()
-        if name.endswith(".zip"):
-            return ArchiveFormat.ZIP
-        elif name.endswith(".tar.gz") or name.endswith(".tgz"):
-            return ArchiveFormat.TAR_GZ
-        elif name.endswith(".tar.bz2"):
-            return ArchiveFormat.TAR_BZ2
-        elif name.endswith(".tar.xz"):
-            return ArchiveFormat.TAR_XZ
-        elif name.endswith(".tar"):
-            return ArchiveFormat.TAR
-        return ArchiveFormat.ZIP
+        if format is None:
+            format = _detect_format(self.path, default=ArchiveFormat.ZIP)
+            if format == ArchiveFormat.GZIP:
+                # Bare .gz isn't a buildable container; keep the ZIP default.
+                format = ArchiveFormat.ZIP
+        elif format == ArchiveFormat.GZIP:
+            raise ArchiveError("ArchiveBuilder cannot write bare gzip files")
+        self.format = format
+        self.threads = threads or 1
+        self.parallel_blocks = parallel_blocks
+        self.block_size = block_size
+        self._zf: Optional[zipfile.ZipFile] = None
+        self._tf: Optional[tarfile.TarFile] = None
+        self._sink = None
+        self._proc = None
+        self._buf_io: Optional[io.BytesIO] = None
+        self._closed = False
+
+    def _open(self) -> None:
+        if self._zf is not None or self._tf is not None:
+            return
+        if self._closed:
+            raise ArchiveError(f"{self.path} is already built")
+        if self.format == ArchiveFormat.ZIP:
+            self._zf = zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED)
+        elif self.format == ArchiveFormat.TAR_GZ and self.threads > 1:
+            sink, proc = _open_parallel_compressor(self.path, self.threads)
+            if sink is not None:
+                self._sink, self._proc = sink, proc
+                self._tf = tarfile.open(fileobj=sink, mode="w|")
+            else:
+                self._tf = tarfile.open(self.path, "w:gz")
+        else:
+            mode = "w"
+            if self.format == ArchiveFormat.TAR_GZ:
+                mode = "w:gz"
+            elif self.format == ArchiveFormat.TAR_BZ2:
+                mode = "w:bz2"
+            elif self.format == ArchiveFormat.TAR_XZ:
+                mode = "w:xz"
+            self._tf = tarfile.open(self.path, mode)
+
+    def _write_path(self, path: str, arcname: str) -> None:
+        if self._zf is not None:
+            if self.parallel_blocks and os.path.getsize(path) > self.block_size:
+                zinfo = zipfile.ZipInfo.from_file(path, arcname)
+                self._write_blocked(self._zf, zinfo, Path(path).read_bytes())
+            else:
+                self._zf.write(path, arcname)
+        else:
+            self._tf.add(path, arcname, recursive=False)
 
     def add_file(self, path: Union[str, Path], arcname: str = None) -> "ArchiveBuilder":
-        path = Path(path)
-        arcname = arcname or path.name
-        self._files.append((path, arcname))
+        path = str(path)
+        arcname = arcname or os.path.basename(path)
+        self._open()
+        self._write_path(path, arcname)
         return self
 
     def add_dir(self, path: Union[str, Path], arcname: str = None) -> "ArchiveBuilder":
-        path = Path(path)
-        base_arcname = arcname or path.name
-        for f in path.rglob("*"):
-            if f.is_file():
-                rel = f.relative_to(path)
-                self._files.append((f, str(Path(base_arcname) / rel)))
+        root = str(path)
+        base_arcname = arcname or os.path.basename(root.rstrip(os.sep))
+        self._open()
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        rel = os.path.relpath(entry.path, root)
+                        arc = posixpath.join(base_arcname, rel.replace(os.sep, "/"))
+                        self._write_path(entry.path, arc)
         return self
 
     def add_bytes(self, data: bytes, arcname: str) -> "ArchiveBuilder":
-        self._files.append((data, arcname))
+        self._open()
+        if self._zf is not None:
+            if self.parallel_blocks and len(data) > self.block_size:
+                zinfo = zipfile.ZipInfo(
+                    arcname, date_time=datetime.now().timetuple()[:6])
+                zinfo.external_attr = 0o600 << 16
+                self._write_blocked(self._zf, zinfo, data)
+            else:
+                self._zf.writestr(arcname, data)
+        else:
+            if self._buf_io is None:
+                self._buf_io = io.BytesIO()
+            self._buf_io.seek(0)
+            self._buf_io.truncate()
+            self._buf_io.write(data)
+            self._buf_io.seek(0)
+            info = tarfile.TarInfo(name=arcname)
+            info.size = len(data)
+            self._tf.addfile(info, self._buf_io)
         return self
 
     def build(self) -> Archive:
-        if self.format == ArchiveFormat.ZIP:
-            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as zf:
-                for src, arcname in self._files:
-                    if isinstance(src, bytes):
-                        zf.writestr(arcname, src)
-                    else:
-                        zf.write(src, arcname)
-        else:
-            mode = "w"
-            if self.format == ArchiveFormat.TAR_GZ:
-                mode = "w:gz"
-            elif self.format == ArchiveFormat.TAR_BZ2:
-                mode = "w:bz2"
-            elif self.format == ArchiveFormat.TAR_XZ:
-                mode = "w:xz"
-            with tarfile.open(self.path, mode) as tf:
-                for src, arcname in self._files:
-                    if isinstance(src, bytes):
-                        import io
-                        info = tarfile.TarInfo(name=arcname)
-                        info.size = len(src)
-                        tf.addfile(info, io.BytesIO(src))
-                    else:
-                        tf.add(src, arcname)
+        if not self._closed:
+            self._open()  # an empty build still produces a valid archive
+            self._close_output()
         return Archive(self.path)
 
+    def __enter__(self) -> "ArchiveBuilder":
+        self._open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._zf is not None or self._tf is not None:
+            self._close_output()
+
+    def _close_output(self) -> None:
+        self._closed = True
+        if self._zf is not None:
+            self._zf.close()
+            self._zf = None
+        if self._tf is not None:
+            self._tf.close()
+            self._tf = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        if self._proc is not None:
+            proc, self._proc = self._proc, None
+            if proc.wait() != 0:
+                raise ArchiveError(f"pigz failed while writing {self.path}")
+
+    def _write_blocked(self, zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo,
+                       data: bytes) -> None:
+        comp = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED,
+                                -zlib.MAX_WBITS)
+        out = bytearray()
+        offsets = []
+        view = memoryview(data)
+        for start in range(0, len(data), self.block_size):
+            offsets.append(len(out))
+            out += comp.compress(view[start:start + self.block_size])
+            # Full flush resets the dictionary so each block decodes alone.
+            out += comp.flush(zlib.Z_FULL_FLUSH)
+        out += comp.flush(zlib.Z_FINISH)
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.file_size = len(data)
+        zinfo.CRC = zlib.crc32(data)
+        zinfo.extra += _pack_block_extra(self.block_size, offsets)
+        _zip_write_precompressed(zf, zinfo, bytes(out))
+
 
 def create_zip(path: str, *files: str, base_dir: str = None) -> Archive:
     builder = ArchiveBuilder(path, ArchiveFormat.ZIP)
@@ -258,6 +971,26 @@ def extract(archive_path: str, dest: str = ".") -> List[Path]:
     return Archive(archive_path).extract(dest)
 
 
+def infos(paths: Iterable[Union[str, Path]], workers: int = None) -> List[ArchiveInfo]:
+    def _load(p: Union[str, Path]) -> ArchiveInfo:
+        # Force the metadata read while we're on the pool, then release the
+        # handles; the memoized listing survives close().
+        with Archive(p) as archive:
+            info = archive.info()
+            info.entries
+        return info
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+        return list(ex.map(_load, paths))
+
+
+def extract_many(archives: Iterable[Union[str, Path]], dest: Union[str, Path] = ".",
+                 workers: int = None) -> List[List[Path]]:
+    dest = Path(dest)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+        return list(ex.map(lambda p: Archive(p).extract(dest), archives))
+
+
 def example_usage():
     import tempfile
     with tempfile.TemporaryDirectory() as tmp: